@@ -8,80 +8,379 @@ GitHub Actions Automated VIX Analysis System
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import json
-from datetime import datetime, timedelta
+import orjson
+from datetime import date, datetime, timedelta
 import warnings
-from arch import arch_model
+from numba import njit, types
+import glob
+import hashlib
 import os
+import zipfile
 
 warnings.filterwarnings('ignore')
 
+CACHE_DIR = ".cache"
+GARCH_STATE_FILE = os.path.join(CACHE_DIR, "garch_state.npz")
+
+# Numbaカーネルの型シグネチャ (import時にコンパイルし__pycache__へキャッシュ)
+# 入力は読み取り専用配列も受け付ける (pandasのCopy-on-Writeで返るビュー等)
+_F32 = types.float32[::1]
+_F64 = types.float64[::1]
+_BOOL = types.boolean[::1]
+_F32_IN = types.Array(types.float32, 1, 'C', readonly=True)
+_F64_IN = types.Array(types.float64, 1, 'C', readonly=True)
+_U8_IN = types.Array(types.uint8, 1, 'C', readonly=True)
+
+@njit(types.Tuple((_F32,) * 10 + (_BOOL,))(_F32_IN, _F32_IN, _F32_IN), cache=True, fastmath=True)
+def _compute_all(vix, nikkei, sp500):
+    """リターン・実現ボラ・相対強弱・VIX移動平均/スパイクを1パスで計算"""
+    # 出力は入力と同じdtype、窓の累積はfloat64で保持
+    n = vix.size
+    dtype = vix.dtype
+    nikkei_returns = np.full(n, np.nan, dtype)
+    sp500_returns = np.full(n, np.nan, dtype)
+    vix_returns = np.full(n, np.nan, dtype)
+    rv_5d = np.full(n, np.nan, dtype)
+    rv_20d = np.full(n, np.nan, dtype)
+    spread = np.full(n, np.nan, dtype)
+    ratio = np.empty(n, dtype)
+    ratio_ma20 = np.full(n, np.nan, dtype)
+    ratio_deviation = np.full(n, np.nan, dtype)
+    vix_ma20 = np.full(n, np.nan, dtype)
+    vix_spike = np.zeros(n, np.bool_)
+    
+    annualize = np.sqrt(252.0) * 100.0
+    ret_sum5 = ret_sq5 = ret_sum20 = ret_sq20 = 0.0
+    ratio_sum = 0.0
+    vix_mean = vix_m2 = 0.0
+    
+    for i in range(n):
+        # 相対強弱の20日移動平均 (窓の和を差分更新)
+        x = np.float64(nikkei[i]) / sp500[i]
+        ratio[i] = x
+        ratio_sum += x
+        if i >= 20:
+            ratio_sum -= np.float64(nikkei[i - 20]) / sp500[i - 20]
+        if i >= 19:
+            ratio_ma20[i] = ratio_sum / 20.0
+            ratio_deviation[i] = x - ratio_sum / 20.0
+        
+        # VIXの20日平均・標準偏差 (桁落ちを避けるためWelford法で窓を更新)
+        v = np.float64(vix[i])
+        if i < 20:
+            delta = v - vix_mean
+            vix_mean += delta / (i + 1)
+            vix_m2 += delta * (v - vix_mean)
+        else:
+            v_old = np.float64(vix[i - 20])
+            prev_mean = vix_mean
+            vix_mean += (v - v_old) / 20.0
+            vix_m2 += (v - v_old) * (v - vix_mean + v_old - prev_mean)
+        if i >= 19:
+            vix_ma20[i] = vix_mean
+            vix_spike[i] = v > vix_mean + np.sqrt(max(vix_m2 / 19.0, 0.0))
+        
+        if i == 0:
+            continue
+        
+        # リターン計算
+        r = np.float64(nikkei[i]) / nikkei[i - 1] - 1.0
+        nikkei_returns[i] = r
+        sp500_returns[i] = np.float64(sp500[i]) / sp500[i - 1] - 1.0
+        vix_returns[i] = np.float64(vix[i]) / vix[i - 1] - 1.0
+        
+        # 実現ボラティリティ (窓の和・二乗和を差分更新)
+        ret_sum5 += r
+        ret_sq5 += r * r
+        ret_sum20 += r
+        ret_sq20 += r * r
+        if i > 5:
+            old = np.float64(nikkei[i - 5]) / nikkei[i - 6] - 1.0
+            ret_sum5 -= old
+            ret_sq5 -= old * old
+        if i > 20:
+            old = np.float64(nikkei[i - 20]) / nikkei[i - 21] - 1.0
+            ret_sum20 -= old
+            ret_sq20 -= old * old
+        if i >= 5:
+            var5 = (ret_sq5 - ret_sum5 * ret_sum5 / 5.0) / 4.0
+            rv_5d[i] = np.sqrt(max(var5, 0.0)) * annualize
+        if i >= 20:
+            var20 = (ret_sq20 - ret_sum20 * ret_sum20 / 20.0) / 19.0
+            rv20 = np.sqrt(max(var20, 0.0)) * annualize
+            rv_20d[i] = rv20
+            spread[i] = vix[i] - rv20
+    
+    return (nikkei_returns, sp500_returns, vix_returns, rv_5d, rv_20d,
+            spread, ratio, ratio_ma20, ratio_deviation, vix_ma20, vix_spike)
+
+def _cached_download(tickers, period):
+    """当日分のキャッシュがない銘柄のみyfinanceで一括ダウンロード"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    today = date.today()
+    frames, missing = {}, []
+    
+    for ticker in tickers:
+        path = os.path.join(CACHE_DIR, f"{ticker}_{period}_{today}.parquet")
+        if os.path.exists(path):
+            try:
+                frames[ticker] = pd.read_parquet(path)
+                continue
+            except (OSError, ValueError):
+                # 破損したキャッシュは再取得して置き換え
+                pass
+        missing.append(ticker)
+    
+    if missing:
+        # 1回の呼び出しでyfinance内部のスレッドプールにより並列取得
+        raw = yf.download(missing, period=period, group_by='ticker',
+                          auto_adjust=True, threads=True)
+        if not raw.empty and not isinstance(raw.columns, pd.MultiIndex):
+            # yfinance 0.2.48未満は1銘柄のみの場合に列を平坦化して返す
+            raw = pd.concat({missing[0]: raw}, axis=1)
+        for ticker in missing:
+            if raw.empty or ticker not in raw.columns.get_level_values(0):
+                frames[ticker] = pd.DataFrame()
+                continue
+            
+            df = raw[ticker].dropna(how='all')
+            frames[ticker] = df
+            if not df.empty:
+                # 一時ファイルに書き込んでから古いキャッシュを置き換え (中断時に壊れたファイルを残さない)
+                prefix = os.path.join(CACHE_DIR, f"{ticker}_{period}_")
+                path = f"{prefix}{today}.parquet"
+                df.to_parquet(f"{path}.tmp", compression="zstd")
+                for stale in glob.glob(f"{prefix}*.parquet"):
+                    if stale != path:
+                        os.remove(stale)
+                os.replace(f"{path}.tmp", path)
+    
+    return frames
+
+@njit(_F64(_F64_IN, _F64_IN, types.float64), cache=True, fastmath=True)
+def _garch11_variance(params, returns, backcast):
+    """GARCH(1,1)の条件付き分散 sigma2[t] = omega + alpha*eps[t-1]^2 + beta*sigma2[t-1]"""
+    mu, omega, alpha, beta = params[0], params[1], params[2], params[3]
+    n = returns.size
+    sigma2 = np.empty(n)
+    sigma2[0] = omega + (alpha + beta) * backcast
+    for t in range(1, n):
+        eps = returns[t - 1] - mu
+        sigma2[t] = omega + alpha * eps * eps + beta * sigma2[t - 1]
+    return sigma2
+
+@njit(types.float64(_F64_IN, _F64_IN, types.float64), cache=True, fastmath=True)
+def _garch11_loglik(params, returns, backcast):
+    """GARCH(1,1)・正規分布の負の対数尤度 (非定常な係数にはペナルティ)"""
+    mu, omega, alpha, beta = params[0], params[1], params[2], params[3]
+    if alpha + beta >= 1.0:
+        return 1e10
+    
+    sigma2 = omega + (alpha + beta) * backcast
+    total = 0.0
+    for t in range(returns.size):
+        if t > 0:
+            eps = returns[t - 1] - mu
+            sigma2 = omega + alpha * eps * eps + beta * sigma2
+        eps = returns[t] - mu
+        total += np.log(sigma2) + eps * eps / sigma2
+    return 0.5 * (returns.size * np.log(2.0 * np.pi) + total)
+
+@njit(types.void(_U8_IN, _U8_IN, _U8_IN, _U8_IN, _BOOL, _BOOL), cache=True)
+def _signals(a, b, c, d, out_warning, out_crash):
+    """4条件(uint8)の該当数から警告・クラッシュシグナルを1ループで判定"""
+    for i in range(a.size):
+        count = a[i] + b[i] + c[i] + d[i]
+        out_warning[i] = count >= 2
+        out_crash[i] = count >= 3
+
+def _garch11_backcast(returns):
+    """初期分散 (archと同じく先頭75日の指数加重二乗残差)"""
+    resids = returns - returns.mean()
+    tau = min(75, resids.size)
+    weights = 0.94 ** np.arange(tau)
+    weights /= weights.sum()
+    return float(np.sum(weights * resids[:tau] ** 2))
+
+def _garch_sample_key(values, last_date, period):
+    """推定対象サンプルの識別情報 (期間・最終日・件数・データのハッシュ)"""
+    return {
+        'period': str(period),
+        'last_date': pd.Timestamp(last_date).isoformat(),
+        'n_obs': int(values.size),
+        'values_hash': hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest()
+    }
+
+def _load_garch_state():
+    """前回実行時のGARCH推定パラメータとサンプル識別情報を読み込み"""
+    try:
+        with np.load(GARCH_STATE_FILE, allow_pickle=False) as f:
+            params = np.asarray(f['params'], dtype=np.float64)
+            key = {k: f[k].item() for k in ('period', 'last_date', 'n_obs', 'values_hash')}
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    if params.shape != (4,) or not np.all(np.isfinite(params)):
+        return None
+    return {'params': params, 'key': key}
+
+def _save_garch_state(params, key):
+    """GARCH推定パラメータを次回のウォームスタート用に保存"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # 書き込み途中で中断しても壊れたファイルが残らないよう一時ファイル経由で置き換え
+    tmp_path = f"{GARCH_STATE_FILE}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, params=np.asarray(params, dtype=np.float64), **key)
+    os.replace(tmp_path, GARCH_STATE_FILE)
+
+def _nanquantile(values, q):
+    """NaNを除いた配列の分位点 (pandasのインデックス整列を経由しない)"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.quantile(values[~np.isnan(values)], q)
+
 class GitHubVIXAnalyzer:
     def __init__(self):
         self.data = None
         self.garch_model = None
         self.risk_score = 0
         self.risk_level = ""
+        self.thresholds = {}
+        self._risk_cache = None
+        self.period = None
+    
+    @property
+    def data(self):
+        """分析結果のDataFrame (アクセスの度にnumpy列から新しく構築)
+
+        返されるのはコピーのため、列追加や .loc による変更は分析結果に
+        反映されない。変更する場合は編集後のDataFrameを
+        analyzer.data = df として代入する。
+        """
+        if not self._columns:
+            return None
+        return pd.DataFrame(self._columns, index=self._index)
+    
+    @data.setter
+    def data(self, frame):
+        self._index = None if frame is None else frame.index
+        self._columns = {} if frame is None else {c: self._own_column(frame[c]) for c in frame.columns}
+        self._risk_cache = None
+    
+    @staticmethod
+    def _own_column(series):
+        """列を書き込み可能な配列としてコピー (カテゴリ列はCategoricalのまま)"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.array.copy()
+        return series.to_numpy(copy=True)
+    
+    def _update_columns(self, **columns):
+        """numpy列を追加・更新"""
+        self._columns.update(columns)
+        self._risk_cache = None
         
     def download_data(self, period='1y'):
         """データ取得（日経VIなし）"""
         print("📊 市場データ取得中...")
         
         # VIX, 日経, S&P500のみ
-        vix = yf.download('^VIX', period=period, auto_adjust=True, threads=True)
-        nikkei = yf.download('^N225', period=period, auto_adjust=True, threads=True)
-        sp500 = yf.download('^GSPC', period=period, auto_adjust=True, threads=True)
+        raw = _cached_download(['^VIX', '^N225', '^GSPC'], period)
+        self.period = period
         
-        if vix.empty or nikkei.empty or sp500.empty:
+        if any(df.empty or df['Close'].dropna().empty for df in raw.values()):
             raise ValueError("データ取得に失敗しました")
         
-        # データフレーム構築
-        data = pd.DataFrame(index=vix.index)
-        data['VIX'] = vix['Close']
-        data['Nikkei'] = nikkei['Close']
-        data['SP500'] = sp500['Close']
+        # 終値の整列 (日米の休場日ずれは1日まで前方補完)
+        combined_index = raw['^VIX'].index.union(raw['^N225'].index).union(raw['^GSPC'].index)
+        closes = pd.DataFrame({
+            'VIX': raw['^VIX']['Close'],
+            'Nikkei': raw['^N225']['Close'],
+            'SP500': raw['^GSPC']['Close'],
+        }).reindex(combined_index).ffill(limit=1).dropna().astype(np.float32)
         
-        # リターン計算
-        data['Nikkei_Returns'] = data['Nikkei'].pct_change()
-        data['SP500_Returns'] = data['SP500'].pct_change()
-        data['VIX_Returns'] = data['VIX'].pct_change()
-        
-        # 実現ボラティリティ計算（日経VI代替）
-        data['Nikkei_RV_5d'] = data['Nikkei_Returns'].rolling(5).std() * np.sqrt(252) * 100
-        data['Nikkei_RV_20d'] = data['Nikkei_Returns'].rolling(20).std() * np.sqrt(252) * 100
-        
-        # VIX vs 実現ボラ スプレッド
-        data['VIX_RV_Spread'] = data['VIX'] - data['Nikkei_RV_20d']
+        self._build_columns(closes['VIX'], closes['Nikkei'], closes['SP500'])
+        print(f"✅ データ取得完了: {len(self._index)}日分")
+        return self.data
+    
+    def _build_columns(self, vix_close, nikkei_close, sp500_close):
+        """終値から全派生列をnumpy配列のまま計算し、欠損のある先頭行を除外"""
+        vix = np.ascontiguousarray(vix_close.to_numpy())
+        nikkei = np.ascontiguousarray(nikkei_close.to_numpy())
+        sp500 = np.ascontiguousarray(sp500_close.to_numpy())
+        
+        # リターン・実現ボラ(日経VI代替)・VIX/RVスプレッド・相対強弱を1パスで計算
+        (nikkei_returns, sp500_returns, vix_returns, rv_5d, rv_20d,
+         spread, ratio, ratio_ma20, ratio_deviation, vix_ma20, vix_spike) = _compute_all(
+            vix, nikkei, sp500)
+        
+        columns = {
+            'VIX': vix,
+            'Nikkei': nikkei,
+            'SP500': sp500,
+            'Nikkei_Returns': nikkei_returns,
+            'SP500_Returns': sp500_returns,
+            'VIX_Returns': vix_returns,
+            'Nikkei_RV_5d': rv_5d,
+            'Nikkei_RV_20d': rv_20d,
+            'VIX_RV_Spread': spread,
+            'Nikkei_SP500_Ratio': ratio,
+            'Ratio_MA20': ratio_ma20,
+            'Ratio_Deviation': ratio_deviation,
+            'VIX_MA20': vix_ma20,
+            'VIX_Spike': vix_spike
+        }
         
-        # 相対的強弱
-        data['Nikkei_SP500_Ratio'] = data['Nikkei'] / data['SP500']
-        data['Ratio_MA20'] = data['Nikkei_SP500_Ratio'].rolling(20).mean()
-        data['Ratio_Deviation'] = data['Nikkei_SP500_Ratio'] - data['Ratio_MA20']
+        # dropna相当: いずれかの列が欠損している行を除外
+        valid = np.ones(vix.size, dtype=np.bool_)
+        for values in columns.values():
+            if values.dtype.kind == 'f':
+                valid &= ~np.isnan(values)
         
-        self.data = data.dropna()
-        print(f"✅ データ取得完了: {len(self.data)}日分")
-        return self.data
+        self.data = None
+        self._index = vix_close.index[valid]
+        self._update_columns(**{name: values[valid] for name, values in columns.items()})
     
     def fit_garch_model(self):
         """GARCH(1,1)モデル推定"""
+        from scipy.optimize import OptimizeResult, minimize
+        
         print("🔬 GARCH(1,1)モデル推定中...")
         
-        returns = self.data['Nikkei_Returns'].dropna() * 100
+        # 尤度計算は倍精度で行う
+        returns = self._columns['Nikkei_Returns'].astype(np.float64) * 100
+        observed = ~np.isnan(returns)
         
         try:
-            self.garch_model = arch_model(returns, vol='Garch', p=1, q=1, 
-                                         mean='Constant', dist='normal')
-            garch_result = self.garch_model.fit(disp='off')
+            values = returns[observed]
+            last_date = self._index[observed][-1]
+            backcast = _garch11_backcast(values)
+            variance = values.var()
             
-            conditional_vol = garch_result.conditional_volatility
-            self.data['GARCH_Vol'] = np.nan
-            self.data.loc[conditional_vol.index, 'GARCH_Vol'] = conditional_vol
-            self.data['GARCH_Vol_Annualized'] = self.data['GARCH_Vol'] * np.sqrt(252)
+            # パラメータ: [mu, omega, alpha, beta]
+            x0 = np.array([values.mean(), variance * 0.05, 0.05, 0.9])
+            lower = np.array([-np.inf, 1e-8 * variance, 0.0, 0.0])
+            upper = np.array([np.inf, 10 * variance, 1.0, 1.0])
             
-            print(f"✅ GARCH推定完了 - 現在予測ボラ: {self.data['GARCH_Vol_Annualized'].iloc[-1]:.2f}%")
+            sample_key = _garch_sample_key(values, last_date, self.period)
+            state = _load_garch_state()
+            if state is not None and state['key'] == sample_key:
+                # 前回と同一サンプルなら再推定せず保存済みパラメータでフィルタのみ
+                garch_result = OptimizeResult(x=state['params'], success=True, nit=0,
+                                              message="cached parameters")
+            else:
+                if state is not None and state['params'][2] + state['params'][3] < 1.0:
+                    # 前回の推定値からウォームスタート
+                    x0 = np.clip(state['params'], lower, upper)
+                garch_result = minimize(_garch11_loglik, x0, args=(values, backcast),
+                                        method='L-BFGS-B', bounds=list(zip(lower, upper)))
+                if garch_result.success:
+                    _save_garch_state(garch_result.x, sample_key)
+            self.garch_model = garch_result
+            
+            garch_vol = np.full(returns.size, np.nan, dtype=np.float32)
+            garch_vol[observed] = np.sqrt(_garch11_variance(garch_result.x, values, backcast))
+            garch_vol_annualized = garch_vol * np.float32(np.sqrt(252))
+            self._update_columns(GARCH_Vol=garch_vol, GARCH_Vol_Annualized=garch_vol_annualized)
+            
+            print(f"✅ GARCH推定完了 - 現在予測ボラ: {garch_vol_annualized[-1]:.2f}%")
             return garch_result
         except Exception as e:
             print(f"⚠️ GARCH推定失敗: {e}")
@@ -91,20 +390,23 @@ class GitHubVIXAnalyzer:
         """リスク指標計算"""
         print("📊 リスク指標計算中...")
         
-        # VIX指標
-        self.data['VIX_MA20'] = self.data['VIX'].rolling(20).mean()
-        self.data['VIX_Spike'] = self.data['VIX'] > (self.data['VIX_MA20'] + self.data['VIX'].rolling(20).std())
+        # 分位点閾値を事前に一括計算
+        self.thresholds = {'spread_q80': _nanquantile(self._columns['VIX_RV_Spread'], 0.8)}
         
         # ボラティリティ・レジーム
-        if 'GARCH_Vol_Annualized' in self.data.columns:
-            garch_quantiles = self.data['GARCH_Vol_Annualized'].quantile([0.33, 0.67])
-            self.data['Vol_Regime'] = np.where(
-                self.data['GARCH_Vol_Annualized'] > garch_quantiles[0.67], 'High',
-                np.where(self.data['GARCH_Vol_Annualized'] < garch_quantiles[0.33], 'Low', 'Medium')
-            )
+        if 'GARCH_Vol_Annualized' in self._columns:
+            garch_vol = self._columns['GARCH_Vol_Annualized']
+            garch_q33, garch_q67 = _nanquantile(garch_vol, [0.33, 0.67])
+            self.thresholds.update(garch_q33=garch_q33, garch_q67=garch_q67)
+            # 0=Low, 1=Medium, 2=High のint8コードで分類 (文字列配列を作らない)
+            codes = (garch_vol >= garch_q33).astype(np.int8) + (garch_vol > garch_q67)
+            self._update_columns(Vol_Regime=pd.Categorical.from_codes(
+                codes, categories=['Low', 'Medium', 'High'], ordered=True))
         
         # 相対強弱過熱
-        self.data['Ratio_Extreme'] = abs(self.data['Ratio_Deviation']) > self.data['Ratio_Deviation'].std() * 2
+        ratio_deviation = self._columns['Ratio_Deviation']
+        self._update_columns(
+            Ratio_Extreme=np.abs(ratio_deviation) > np.nanstd(ratio_deviation, ddof=1) * 2)
         
         print("✅ リスク指標計算完了")
     
@@ -113,34 +415,46 @@ class GitHubVIXAnalyzer:
         print("🚨 シグナル生成中...")
         
         # 警告条件
-        vix_elevated = self.data['VIX'] > 25
-        vix_rv_spread_high = self.data['VIX_RV_Spread'] > self.data['VIX_RV_Spread'].quantile(0.8)
-        ratio_extreme = self.data['Ratio_Extreme']
+        vix_elevated = self._columns['VIX'] > 25
+        vix_rv_spread_high = self._columns['VIX_RV_Spread'] > self.thresholds['spread_q80']
+        ratio_extreme = self._columns['Ratio_Extreme']
         
-        if 'Vol_Regime' in self.data.columns:
-            vol_regime_high = self.data['Vol_Regime'] == 'High'
+        if 'Vol_Regime' in self._columns:
+            # int8コードで比較 (2=High)
+            vol_regime_high = self._columns['Vol_Regime'].codes == 2
         else:
-            vol_regime_high = pd.Series(False, index=self.data.index)
+            vol_regime_high = np.zeros(len(self._index), dtype=np.bool_)
         
-        # 複合シグナル
-        signal_count = (vix_elevated.astype(int) + 
-                       vix_rv_spread_high.astype(int) + 
-                       ratio_extreme.astype(int) + 
-                       vol_regime_high.astype(int))
+        # 複合シグナル (bool配列をuint8として参照し1パスで集計)
+        n = len(self._index)
+        warning_signal = np.empty(n, dtype=np.bool_)
+        crash_signal = np.empty(n, dtype=np.bool_)
+        _signals(vix_elevated.view(np.uint8),
+                 vix_rv_spread_high.view(np.uint8),
+                 ratio_extreme.view(np.uint8),
+                 vol_regime_high.view(np.uint8),
+                 warning_signal, crash_signal)
         
-        self.data['Warning_Signal'] = signal_count >= 2
-        self.data['Crash_Signal'] = signal_count >= 3
+        self._update_columns(Warning_Signal=warning_signal, Crash_Signal=crash_signal)
         
         print("✅ シグナル生成完了")
     
+    def _latest(self, columns):
+        """最新行の値をnumpyスカラーで取得 (DataFrameを経由しない)"""
+        return {c: self._columns[c][-1] for c in columns if c in self._columns}
+    
     def calculate_risk_score(self):
-        """総合リスクスコア計算"""
-        latest = self.data.iloc[-1]
+        """総合リスクスコア計算 (データ更新までは前回結果を再利用)"""
+        if self._risk_cache is not None:
+            return self._risk_cache
+        
+        latest = self._latest(('VIX', 'GARCH_Vol_Annualized', 'Nikkei_RV_20d',
+                               'VIX_RV_Spread', 'Ratio_Deviation'))
         
         # 各指標のスコア計算 (0-100)
         vix_score = min(latest['VIX'] / 40 * 100, 100)
         
-        if 'GARCH_Vol_Annualized' in self.data.columns:
+        if 'GARCH_Vol_Annualized' in latest:
             garch_score = min(latest['GARCH_Vol_Annualized'] / 30 * 100, 100)
         else:
             garch_score = min(latest['Nikkei_RV_20d'] / 30 * 100, 100)
@@ -161,7 +475,7 @@ class GitHubVIXAnalyzer:
         
         print(f"🎯 リスクスコア: {self.risk_score:.1f}/100 - {self.risk_level}")
         
-        return {
+        self._risk_cache = {
             'total_score': self.risk_score,
             'level': self.risk_level,
             'vix_score': vix_score,
@@ -169,14 +483,27 @@ class GitHubVIXAnalyzer:
             'spread_score': spread_score,
             'ratio_score': ratio_score
         }
+        return self._risk_cache
     
     def create_dashboard(self, save_path="docs"):
         """GitHub Pages用ダッシュボード作成"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
         print("📈 GitHub Pages用ダッシュボード作成中...")
         
         # ディレクトリ作成
         os.makedirs(save_path, exist_ok=True)
         
+        # DataFrameは1回だけ構築して使い回す
+        data = self.data
+        
+        # 折れ線は各週の最終取引日の値に間引き (日付は実際の取引日のまま)、シグナル日は日次データから抽出
+        line_columns = ['VIX', 'Nikkei_RV_20d', 'Nikkei_SP500_Ratio']
+        if 'GARCH_Vol_Annualized' in data.columns:
+            line_columns.append('GARCH_Vol_Annualized')
+        plot_data = data[line_columns].groupby(data.index.to_period('W')).tail(1)
+        
         # Plotly ダッシュボード
         fig = make_subplots(
             rows=3, cols=2,
@@ -195,7 +522,7 @@ class GitHubVIXAnalyzer:
         
         # 1. VIX Overview
         fig.add_trace(
-            go.Scatter(x=self.data.index, y=self.data['VIX'],
+            go.Scatter(x=plot_data.index, y=plot_data['VIX'],
                       name='VIX恐怖指数', line=dict(color='red', width=3)),
             row=1, col=1
         )
@@ -207,7 +534,7 @@ class GitHubVIXAnalyzer:
                      annotation_text="高警戒水準(30)", row=1, col=1)
         
         # 2. Risk Score (Bar Chart代替)
-        latest = self.data.iloc[-1]
+        latest = self._latest(('VIX', 'Nikkei_RV_20d', 'VIX_RV_Spread'))
         risk_data = self.calculate_risk_score()
         
         risk_components = ['VIX Score', 'Vol Score', 'Spread Score', 'Ratio Score']
@@ -234,39 +561,39 @@ class GitHubVIXAnalyzer:
         )
         
         # 3. VIX vs RV
-        if 'GARCH_Vol_Annualized' in self.data.columns:
+        if 'GARCH_Vol_Annualized' in data.columns:
             fig.add_trace(
-                go.Scatter(x=self.data.index, y=self.data['GARCH_Vol_Annualized'],
+                go.Scatter(x=plot_data.index, y=plot_data['GARCH_Vol_Annualized'],
                           name='GARCH予測ボラ', line=dict(color='blue')),
                 row=2, col=1
             )
         
         fig.add_trace(
-            go.Scatter(x=self.data.index, y=self.data['Nikkei_RV_20d'],
+            go.Scatter(x=plot_data.index, y=plot_data['Nikkei_RV_20d'],
                       name='実現ボラ20日', line=dict(color='green')),
             row=2, col=1
         )
         
         # 4. Relative Strength
         fig.add_trace(
-            go.Scatter(x=self.data.index, y=self.data['Nikkei_SP500_Ratio'],
+            go.Scatter(x=plot_data.index, y=plot_data['Nikkei_SP500_Ratio'],
                       name='日経/SP500比率', line=dict(color='purple')),
             row=2, col=2
         )
         
         # 5. Signals
-        warning_dates = self.data[self.data['Warning_Signal']].index
-        crash_dates = self.data[self.data['Crash_Signal']].index
+        warning_dates = data[data['Warning_Signal']].index
+        crash_dates = data[data['Crash_Signal']].index
         
         fig.add_trace(
-            go.Scatter(x=self.data.index, y=self.data['VIX'],
+            go.Scatter(x=plot_data.index, y=plot_data['VIX'],
                       name='VIX', line=dict(color='black')),
             row=3, col=1
         )
         
         if len(warning_dates) > 0:
             fig.add_trace(
-                go.Scatter(x=warning_dates, y=self.data.loc[warning_dates, 'VIX'],
+                go.Scatter(x=warning_dates, y=data.loc[warning_dates, 'VIX'],
                           mode='markers', name='警告シグナル',
                           marker=dict(color='orange', size=8)),
                 row=3, col=1
@@ -274,7 +601,7 @@ class GitHubVIXAnalyzer:
         
         if len(crash_dates) > 0:
             fig.add_trace(
-                go.Scatter(x=crash_dates, y=self.data.loc[crash_dates, 'VIX'],
+                go.Scatter(x=crash_dates, y=data.loc[crash_dates, 'VIX'],
                           mode='markers', name='クラッシュシグナル',
                           marker=dict(color='red', size=10, symbol='triangle-down')),
                 row=3, col=1
@@ -313,54 +640,58 @@ class GitHubVIXAnalyzer:
         
         # HTML保存
         html_file = os.path.join(save_path, "index.html")
-        fig.write_html(html_file)
+        # plotly.jsはCDNから読み込み (HTMLに約4MBのバンドルを埋め込まない)
+        fig.write_html(html_file, include_plotlyjs='cdn', include_mathjax=False, validate=False)
         print(f"✅ ダッシュボード保存: {html_file}")
         
         return html_file
     
     def generate_json_report(self, save_path="docs"):
         """JSON レポート生成"""
-        latest = self.data.iloc[-1]
-        latest_date = self.data.index[-1].strftime('%Y-%m-%d')
+        latest = self._latest(('VIX', 'Nikkei', 'SP500', 'Nikkei_RV_20d', 'VIX_RV_Spread',
+                               'Nikkei_SP500_Ratio', 'Warning_Signal', 'Crash_Signal'))
+        latest_date = self._index[-1].strftime('%Y-%m-%d')
         
         risk_data = self.calculate_risk_score()
         
         report = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "analysis_date": latest_date,
             "risk_assessment": {
-                "total_score": round(self.risk_score, 1),
+                "total_score": np.round(self.risk_score, 1),
                 "level": self.risk_level,
                 "components": {
-                    "vix_score": round(risk_data['vix_score'], 1),
-                    "volatility_score": round(risk_data['volatility_score'], 1),
-                    "spread_score": round(risk_data['spread_score'], 1),
-                    "ratio_score": round(risk_data['ratio_score'], 1)
+                    "vix_score": np.round(risk_data['vix_score'], 1),
+                    "volatility_score": np.round(risk_data['volatility_score'], 1),
+                    "spread_score": np.round(risk_data['spread_score'], 1),
+                    "ratio_score": np.round(risk_data['ratio_score'], 1)
                 }
             },
             "current_metrics": {
-                "vix": round(latest['VIX'], 2),
-                "nikkei": round(latest['Nikkei'], 2),
-                "sp500": round(latest['SP500'], 2),
-                "nikkei_rv_20d": round(latest['Nikkei_RV_20d'], 2),
-                "vix_rv_spread": round(latest['VIX_RV_Spread'], 2),
-                "nikkei_sp500_ratio": round(latest['Nikkei_SP500_Ratio'], 4)
+                "vix": np.round(latest['VIX'], 2),
+                "nikkei": np.round(latest['Nikkei'], 2),
+                "sp500": np.round(latest['SP500'], 2),
+                "nikkei_rv_20d": np.round(latest['Nikkei_RV_20d'], 2),
+                "vix_rv_spread": np.round(latest['VIX_RV_Spread'], 2),
+                "nikkei_sp500_ratio": np.round(latest['Nikkei_SP500_Ratio'], 4)
             },
             "signals": {
                 "warning_signal": int(latest['Warning_Signal']),
                 "crash_signal": int(latest['Crash_Signal'])
             },
-            "alert_required": bool(self.risk_score > 60 or latest['Crash_Signal'])
+            "alert_required": self.risk_score > 60 or latest['Crash_Signal']
         }
         
-        # JSON保存
+        # JSON保存 (orjsonでnumpyスカラー・datetimeを直接シリアライズ)
         os.makedirs(save_path, exist_ok=True)
         json_file = os.path.join(save_path, "risk_report.json")
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        payload = orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        with open(json_file, 'wb') as f:
+            f.write(payload)
         
         print(f"✅ JSONレポート保存: {json_file}")
-        return report
+        # 戻り値は保存内容と同じJSONネイティブ型 (str/float/int/bool) で返す
+        return orjson.loads(payload)
 
 def main():
     """メイン実行関数"""
@@ -371,6 +702,7 @@ def main():
     analyzer.fit_garch_model()
     analyzer.calculate_risk_indicators()
     analyzer.generate_signals()
+    analyzer.calculate_risk_score()
     
     # ダッシュボード・レポート作成
     analyzer.create_dashboard()